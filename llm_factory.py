@@ -0,0 +1,15 @@
+import os
+import functools
+
+
+# Initialize Groq LLM (one client per process)
+@functools.lru_cache(maxsize=1)
+def init_llm():
+    # Imported here: langchain_groq pulls in a large dependency tree at import
+    from langchain_groq import ChatGroq
+
+    return ChatGroq(
+        model=os.getenv("GROQ_MODEL", "llama3-70b-8192"),
+        temperature=0,
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+    )
@@ -0,0 +1,683 @@
+import asyncio
+import functools
+import os
+import re
+from typing import Dict, Iterator, List, Optional
+from langchain_core.tools import StructuredTool
+import aiohttp
+import msgspec
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree
+from dotenv import load_dotenv
+
+# Load environment variables (NCBI settings are read at import time)
+load_dotenv()
+
+# Sent with every E-utilities request; efetch XML compresses very well
+_DEFAULT_HEADERS = {
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "PubMedResearchAssistant/1.0",
+}
+
+# NCBI etiquette parameters sent on every request. An API key raises the
+# rate limit from 3 to 10 requests per second
+_NCBI_PARAMS = {"tool": "PubMedResearchAssistant"}
+if os.getenv("CONTACT_EMAIL"):
+    _NCBI_PARAMS["email"] = os.getenv("CONTACT_EMAIL")
+if os.getenv("NCBI_API_KEY"):
+    _NCBI_PARAMS["api_key"] = os.getenv("NCBI_API_KEY")
+
+# Shared HTTP session so repeated E-utilities calls reuse the TLS connection
+SESSION = requests.Session()
+SESSION.headers.update(_DEFAULT_HEADERS)
+SESSION.params.update(_NCBI_PARAMS)
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        # Retry transient gateway errors too. NCBI answers bursts over its rate
+        # limit with 429; wait as long as its Retry-After header asks
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+        ),
+    ),
+)
+
+# How many papers an author search returns full details for
+AUTO_DETAILS_COUNT = 3
+
+# NCBI serves only the first 10,000 records of a PubMed search, history server
+# included
+MAX_RETRIEVABLE_RECORDS = 10_000
+
+# Display caps: neither front end shows more than this, so parsing stops here
+MAX_AUTHORS_SHOWN = 10
+MAX_ABSTRACT_CHARS = 4096
+
+# Leading honorifics stripped from author names ("Dr.", "prof", "Prof. Dr." ...)
+_TITLE_RE = re.compile(
+    r"^(?:(?:Dr|Prof)\.?|Professor|Mr\.|Ms\.|Mrs\.)\s+(?:(?:Dr|Prof)\.?\s+)?",
+    re.IGNORECASE,
+)
+
+
+# Typed esearch JSON; unknown keys (header, translationset, ...) are skipped
+class EsearchInner(msgspec.Struct):
+    count: str = "0"
+    idlist: List[str] = []
+    webenv: Optional[str] = None
+    querykey: Optional[str] = None
+
+
+class EsearchResult(msgspec.Struct):
+    esearchresult: EsearchInner = msgspec.field(default_factory=EsearchInner)
+
+
+_ESEARCH_DECODER = msgspec.json.Decoder(EsearchResult)
+
+
+# Parser options: no entity expansion or network/DTD loads, and no whitespace-only
+# nodes from NCBI's indented XML
+_PARSE_OPTIONS = dict(
+    resolve_entities=False,
+    no_network=True,
+    load_dtd=False,
+    huge_tree=False,
+    remove_blank_text=True,
+    collect_ids=False,
+)
+
+
+# Async HTTP sessions, one per event loop (aiohttp sessions are bound to a loop).
+# Keyed on the loop rather than a context variable: LangChain runs each tool
+# coroutine in a copied context, so a session stored there would not be reused.
+_ASYNC_SESSIONS: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def _get_async_session() -> aiohttp.ClientSession:
+    """Return the aiohttp session for the running loop, creating it if needed."""
+    loop = asyncio.get_running_loop()
+    session = _ASYNC_SESSIONS.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=5),
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers=_DEFAULT_HEADERS,
+        )
+        _ASYNC_SESSIONS[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Close the running loop's aiohttp session, if one was opened."""
+    session = _ASYNC_SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def clean_author_name(author_name: str) -> str:
+    """Clean up the author name - remove titles like Dr., Prof., etc."""
+    return _TITLE_RE.sub("", author_name.strip())
+
+
+def decode_esearch(content: bytes) -> EsearchInner:
+    """Decode an esearch JSON body straight into its typed inner result."""
+    return _ESEARCH_DECODER.decode(content).esearchresult
+
+
+def _author_search_result(
+    esearch: EsearchInner, searched_for: str, papers: List[Dict]
+) -> Dict:
+    """Structured result of an author search, with any prefetched paper details."""
+    return {
+        "success": True,
+        "count": int(esearch.count),
+        "author": searched_for,
+        "paper_ids": esearch.idlist,
+        "papers": papers,
+    }
+
+
+# XML parsing
+def _display_fields(authors: List[str], doi: Optional[str]) -> Dict:
+    """Ready-to-render strings, computed once per paper instead of once per render."""
+    return {
+        "authors_str": ", ".join(authors) or "No authors listed",
+        "doi_link": f"https://doi.org/{doi}" if doi else "",
+    }
+
+
+# PubmedArticle subtrees that never hold a displayed field; the walk steps over
+# them instead of visiting every descendant
+_SKIPPED_SUBTREES = frozenset(
+    {
+        "ArticleDate",
+        "ChemicalList",
+        "CommentsCorrectionsList",
+        "GrantList",
+        "History",
+        "KeywordList",
+        "MedlineJournalInfo",
+        "MeshHeadingList",
+        "PublicationTypeList",
+        "SupplMeshList",
+    }
+)
+
+
+def _parse_article(article) -> Dict:
+    """Extract the fields we display from a single <PubmedArticle> element.
+
+    One walk over the article collects every field. The article's own DOI sits
+    in PubmedData after everything else we need, so the walk stops there (or
+    at the reference list, whose ArticleIds belong to other papers).
+    """
+    paper_id = title = journal = year = doi = None
+    abstract_parts = []
+    abstract_len = 0
+    authors = []
+
+    walker = etree.iterwalk(article, events=("start",))
+    for _, elem in walker:
+        tag = elem.tag
+        if tag in _SKIPPED_SUBTREES:
+            walker.skip_subtree()
+        elif tag == "PMID":
+            # Later PMIDs belong to comments/corrections, not this article
+            if paper_id is None:
+                paper_id = elem.text or ""
+            walker.skip_subtree()
+        elif tag == "ArticleTitle":
+            if title is None:
+                # itertext keeps words inside inline markup such as <i>
+                title = "".join(elem.itertext())
+            walker.skip_subtree()
+        elif tag == "AbstractText":
+            # Stop collecting once the abstract is long enough to display
+            if abstract_len < MAX_ABSTRACT_CHARS:
+                label = elem.get("Label", "")
+                content = elem.text or ""
+                part = f"{label}: {content}" if label else content
+                abstract_parts.append(part)
+                abstract_len += len(part) + 1
+            walker.skip_subtree()
+        elif tag == "Author":
+            # Authors up to the display cap, then a single "et al."
+            if len(authors) < MAX_AUTHORS_SHOWN:
+                last_name = elem.findtext("LastName", "")
+                fore_name = elem.findtext("ForeName", "")
+                if last_name or fore_name:
+                    authors.append(f"{fore_name} {last_name}".strip())
+            elif authors[-1] != "et al.":
+                authors.append("et al.")
+            walker.skip_subtree()
+        elif tag == "Title" and journal is None and elem.getparent().tag == "Journal":
+            journal = elem.text
+        elif tag == "Year" and year is None and elem.getparent().tag == "PubDate":
+            year = elem.text
+        elif tag == "ArticleId" and elem.get("IdType") == "doi":
+            doi = elem.text
+            break
+        elif tag == "ReferenceList":
+            break
+
+    if abstract_parts:
+        abstract = " ".join(abstract_parts)
+        if len(abstract) > MAX_ABSTRACT_CHARS:
+            abstract = abstract[:MAX_ABSTRACT_CHARS].rstrip() + "..."
+    else:
+        abstract = "No abstract available"
+
+    return {
+        "paper_id": paper_id or "",
+        "title": title or "No title",
+        "authors": authors,
+        "journal": journal or "Unknown journal",
+        "year": year or "Unknown year",
+        "doi": doi,
+        "abstract": abstract,
+        **_display_fields(authors, doi),
+    }
+
+
+def _release(article):
+    """Drop a parsed article and any already-processed siblings from the tree."""
+    article.clear()
+    while article.getprevious() is not None:
+        del article.getparent()[0]
+
+
+def _iter_articles(source) -> Iterator[Dict]:
+    """Stream-parse <PubmedArticle> elements from a file-like efetch response.
+
+    Only one article is held in memory at a time.
+    """
+    for _, article in etree.iterparse(
+        source, events=("end",), tag="PubmedArticle", **_PARSE_OPTIONS
+    ):
+        yield _parse_article(article)
+        _release(article)
+
+
+async def _aparse_articles(response) -> List[Dict]:
+    """Parse <PubmedArticle> elements from an aiohttp response as its chunks arrive,
+    so parsing overlaps the download instead of waiting for the whole body."""
+    parser = etree.XMLPullParser(events=("end",), tag="PubmedArticle", **_PARSE_OPTIONS)
+    papers = []
+    async for chunk in response.content.iter_chunked(16384):
+        parser.feed(chunk)
+        for _, article in parser.read_events():
+            papers.append(_parse_article(article))
+            _release(article)
+    parser.close()
+    return papers
+
+
+def _efetch_stream(params: Dict) -> Iterator[Dict]:
+    """Run an efetch request (by ID list or history key) and stream-parse it."""
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    params = {"db": "pubmed", "retmode": "xml", **params}
+
+    with SESSION.get(base_url, params=params, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        # Let urllib3 undo any gzip transfer encoding before lxml sees the bytes
+        response.raw.decode_content = True
+        yield from _iter_articles(response.raw)
+
+
+def _parse_summary(doc: Dict) -> Dict:
+    """Card fields from one ESummary document. ESummary carries no abstract."""
+    # Author names come as "Lastname Initials"; keep the same display cap
+    authors = [
+        author["name"] for author in doc.get("authors", []) if author.get("name")
+    ]
+    if len(authors) > MAX_AUTHORS_SHOWN:
+        authors = authors[:MAX_AUTHORS_SHOWN] + ["et al."]
+
+    pubdate = doc.get("pubdate", "")
+    doi = next(
+        (
+            aid.get("value")
+            for aid in doc.get("articleids", [])
+            if aid.get("idtype") == "doi"
+        ),
+        None,
+    )
+
+    return {
+        "paper_id": doc.get("uid", ""),
+        "title": doc.get("title") or "No title",
+        "authors": authors,
+        "journal": doc.get("fulljournalname") or doc.get("source") or "Unknown journal",
+        "year": pubdate[:4] if pubdate[:4].isdigit() else "Unknown year",
+        "doi": doi,
+        **_display_fields(authors, doi),
+    }
+
+
+def _esummary(params: Dict) -> List[Dict]:
+    """Run an esummary request (by ID list or history key) and parse the documents."""
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+    params = {"db": "pubmed", "retmode": "json", **params}
+
+    response = SESSION.get(base_url, params=params, timeout=10)
+    response.raise_for_status()
+    result = msgspec.json.decode(response.content).get("result", {})
+
+    # Unknown IDs come back as documents with only an "error" key
+    return [
+        _parse_summary(result[uid])
+        for uid in result.get("uids", [])
+        if "error" not in result.get(uid, {"error": True})
+    ]
+
+
+def esummary_batch(paper_ids: List[str]) -> List[Dict]:
+    """Card fields for several papers from one esummary request, much smaller than
+    the efetch XML. Papers have no "abstract" key; fetch details for that."""
+    print(f"[Tool] Getting summaries for paper IDs: {', '.join(paper_ids)}")
+    return _esummary({"id": ",".join(paper_ids)})
+
+
+def esummary_history(
+    webenv: str, query_key: str, retstart: int, retmax: int
+) -> List[Dict]:
+    """One page of card fields for a search kept on NCBI's history server
+    (esearch with usehistory=y), in the search's own order."""
+    print(f"[Tool] Getting summaries {retstart + 1}-{retstart + retmax} from history")
+    return _esummary(
+        {
+            "WebEnv": webenv,
+            "query_key": query_key,
+            "retstart": retstart,
+            "retmax": retmax,
+        }
+    )
+
+
+@functools.lru_cache(maxsize=512)
+def fetch_paper_details(paper_id: str) -> Optional[Dict]:
+    """Fetch and parse one paper. Cached, since a paper ID's details don't change."""
+    papers = list(_efetch_stream({"id": paper_id}))
+    return papers[0] if papers else None
+
+
+# PubMed API Tools
+# Tools return a dict on success and an error message string otherwise.
+def _search_papers_by_author(author_name: str):
+    """Search for papers by a specific author using PubMed API."""
+    cleaned_name = clean_author_name(author_name)
+
+    print(
+        f"[Tool] Searching papers for author: {cleaned_name} (original: {author_name})"
+    )
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+
+    params = {
+        "db": "pubmed",
+        "term": f"{cleaned_name}[Author]",
+        "retmax": 20,
+        "retmode": "json",
+        "usehistory": "y",  # Keep results on NCBI's history server for efetch
+    }
+
+    try:
+        response = SESSION.get(base_url, params=params, timeout=10)
+        response.raise_for_status()
+        esearch = decode_esearch(response.content)
+        searched_for = cleaned_name
+
+        if esearch.count == "0":
+            # Try with just last name
+            last_name = (
+                cleaned_name.split()[-1] if cleaned_name.split() else cleaned_name
+            )
+            params["term"] = f"{last_name}[Author]"
+            response = SESSION.get(base_url, params=params, timeout=10)
+            esearch = decode_esearch(response.content)
+            if esearch.count != "0":
+                searched_for = f"authors with last name '{last_name}'"
+
+        if esearch.count == "0":
+            return _author_search_result(esearch, searched_for, [])
+
+        # Prefetch the first papers straight from the history server
+        try:
+            papers = list(
+                _efetch_stream(
+                    {
+                        "WebEnv": esearch.webenv,
+                        "query_key": esearch.querykey,
+                        "retmax": AUTO_DETAILS_COUNT,
+                    }
+                )
+            )
+        except Exception as e:
+            print(f"[Tool] Could not prefetch paper details: {str(e)}")
+            papers = []
+
+        return _author_search_result(esearch, searched_for, papers)
+    except Exception as e:
+        return f"Error searching papers: {str(e)}"
+
+
+def search_papers_for_authors_batch(names: List[str], k: int = AUTO_DETAILS_COUNT):
+    """Search several authors at once: one esearch OR-ing every name, then one
+    esummary of the first k combined results from the history server.
+
+    Returns the same shape as an author search, with "webenv"/"query_key" for
+    paging through the rest.
+    """
+    cleaned_names = [clean_author_name(name) for name in names]
+    print(f"[Tool] Searching papers for authors: {', '.join(cleaned_names)}")
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+
+    params = {
+        "db": "pubmed",
+        "term": " OR ".join(f"({name}[Author])" for name in cleaned_names),
+        "retmax": 20,
+        "retmode": "json",
+        "sort": "pub_date",  # Newest first across all authors
+        "usehistory": "y",
+    }
+
+    try:
+        response = SESSION.get(base_url, params=params, timeout=10)
+        response.raise_for_status()
+        esearch = decode_esearch(response.content)
+
+        papers = []
+        if esearch.count != "0" and k > 0:
+            try:
+                papers = esummary_history(esearch.webenv, esearch.querykey, 0, k)
+            except Exception as e:
+                print(f"[Tool] Could not prefetch paper summaries: {str(e)}")
+
+        return {
+            **_author_search_result(esearch, ", ".join(cleaned_names), papers),
+            "webenv": esearch.webenv,
+            "query_key": esearch.querykey,
+        }
+    except Exception as e:
+        return f"Error searching papers: {str(e)}"
+
+
+def _search_paper_by_title(title: str):
+    """Search for papers by title using PubMed API."""
+    print(f"[Tool] Searching for paper with title: {title[:50]}...")
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+
+    params = {
+        "db": "pubmed",
+        "term": f'"{title}"[Title]',  # Exact title search
+        "retmax": 5,
+        "retmode": "json",
+    }
+
+    try:
+        response = SESSION.get(base_url, params=params, timeout=10)
+        response.raise_for_status()
+        esearch = decode_esearch(response.content)
+
+        id_list = esearch.idlist
+        count = esearch.count
+
+        if id_list:
+            print(
+                f"[Tool] Found {count} paper(s) matching title. Getting details for first match..."
+            )
+            # Automatically get details for the first result
+            return get_paper_details.invoke({"paper_id": id_list[0]})
+        else:
+            # Try partial title search if exact match fails
+            params["term"] = f"{title}[Title]"  # Remove quotes for partial match
+            response = SESSION.get(base_url, params=params, timeout=10)
+            id_list = decode_esearch(response.content).idlist
+
+            if id_list:
+                print(
+                    f"[Tool] Found {len(id_list)} paper(s) with partial title match. Getting details for first match..."
+                )
+                return get_paper_details.invoke({"paper_id": id_list[0]})
+
+        return "No papers found with this title. Try searching by author or use a shorter title."
+    except Exception as e:
+        return f"Error searching paper by title: {str(e)}"
+
+
+def _get_paper_details(paper_id: str):
+    """Get detailed information about a paper by its PubMed ID."""
+    print(f"[Tool] Getting details for paper ID: {paper_id}")
+
+    # Validate paper ID
+    if not paper_id.isdigit():
+        return f"Invalid paper ID: {paper_id}. Paper IDs must be numeric."
+
+    try:
+        paper = fetch_paper_details(paper_id)
+
+        if paper is None:
+            return f"No article found for ID {paper_id}"
+
+        return paper
+
+    except Exception as e:
+        return f"Error fetching paper details: {str(e)}"
+
+
+# Async PubMed API Tools - same behaviour as the sync versions, without blocking
+async def asearch_author_with_details(author_name: str, k: int = AUTO_DETAILS_COUNT):
+    """Search an author and fetch the first k papers' details in one pipeline.
+
+    One esearch leaves the hits on NCBI's history server, then one efetch pulls
+    the top k articles from there.
+    """
+    cleaned_name = clean_author_name(author_name)
+
+    print(
+        f"[Tool] Searching papers for author: {cleaned_name} (original: {author_name})"
+    )
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+
+    params = {
+        "db": "pubmed",
+        "term": f"{cleaned_name}[Author]",
+        "retmax": 20,
+        "retmode": "json",
+        "usehistory": "y",  # Keep results on NCBI's history server for efetch
+    }
+
+    try:
+        session = _get_async_session()
+        async with session.get(base_url, params={**params, **_NCBI_PARAMS}) as response:
+            response.raise_for_status()
+            esearch = decode_esearch(await response.read())
+        searched_for = cleaned_name
+
+        if esearch.count == "0":
+            # Try with just last name
+            last_name = (
+                cleaned_name.split()[-1] if cleaned_name.split() else cleaned_name
+            )
+            params["term"] = f"{last_name}[Author]"
+            async with session.get(
+                base_url, params={**params, **_NCBI_PARAMS}
+            ) as response:
+                esearch = decode_esearch(await response.read())
+            if esearch.count != "0":
+                searched_for = f"authors with last name '{last_name}'"
+
+        if esearch.count == "0" or k <= 0:
+            return _author_search_result(esearch, searched_for, [])
+
+        # Fetch the first papers straight from the history server
+        efetch_params = {
+            "db": "pubmed",
+            "retmode": "xml",
+            "WebEnv": esearch.webenv,
+            "query_key": esearch.querykey,
+            "retmax": k,
+        }
+        try:
+            async with session.get(
+                "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+                params={**efetch_params, **_NCBI_PARAMS},
+            ) as response:
+                response.raise_for_status()
+                papers = await _aparse_articles(response)
+        except Exception as e:
+            print(f"[Tool] Could not prefetch paper details: {str(e)}")
+            papers = []
+
+        return _author_search_result(esearch, searched_for, papers)
+    except Exception as e:
+        return f"Error searching papers: {str(e)}"
+
+
+async def asearch_papers_by_author(author_name: str):
+    """Search for papers by a specific author using PubMed API."""
+    return await asearch_author_with_details(author_name)
+
+
+async def asearch_paper_by_title(title: str):
+    """Search for papers by title using PubMed API."""
+    print(f"[Tool] Searching for paper with title: {title[:50]}...")
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+
+    params = {
+        "db": "pubmed",
+        "term": f'"{title}"[Title]',  # Exact title search
+        "retmax": 5,
+        "retmode": "json",
+    }
+
+    try:
+        session = _get_async_session()
+        async with session.get(base_url, params={**params, **_NCBI_PARAMS}) as response:
+            response.raise_for_status()
+            id_list = decode_esearch(await response.read()).idlist
+
+        if not id_list:
+            # Try partial title search if exact match fails
+            params["term"] = f"{title}[Title]"
+            async with session.get(
+                base_url, params={**params, **_NCBI_PARAMS}
+            ) as response:
+                id_list = decode_esearch(await response.read()).idlist
+
+        if id_list:
+            return await aget_paper_details(id_list[0])
+
+        return "No papers found with this title. Try searching by author or use a shorter title."
+    except Exception as e:
+        return f"Error searching paper by title: {str(e)}"
+
+
+async def aget_paper_details(paper_id: str):
+    """Get detailed information about a paper by its PubMed ID."""
+    print(f"[Tool] Getting details for paper ID: {paper_id}")
+
+    # Validate paper ID
+    if not paper_id.isdigit():
+        return f"Invalid paper ID: {paper_id}. Paper IDs must be numeric."
+
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    params = {"db": "pubmed", "id": paper_id, "retmode": "xml"}
+
+    try:
+        session = _get_async_session()
+        async with session.get(base_url, params={**params, **_NCBI_PARAMS}) as response:
+            response.raise_for_status()
+            papers = await _aparse_articles(response)
+
+        if not papers:
+            return f"No article found for ID {paper_id}"
+
+        return papers[0]
+
+    except Exception as e:
+        return f"Error fetching paper details: {str(e)}"
+
+
+# Register each tool with both a sync and an async implementation
+search_papers_by_author = StructuredTool.from_function(
+    func=_search_papers_by_author,
+    coroutine=asearch_papers_by_author,
+    name="search_papers_by_author",
+)
+search_paper_by_title = StructuredTool.from_function(
+    func=_search_paper_by_title,
+    coroutine=asearch_paper_by_title,
+    name="search_paper_by_title",
+)
+get_paper_details = StructuredTool.from_function(
+    func=_get_paper_details,
+    coroutine=aget_paper_details,
+    name="get_paper_details",
+)
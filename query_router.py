@@ -0,0 +1,136 @@
+import re
+import functools
+from typing import Optional, Sequence, Tuple
+from langchain_core.messages import HumanMessage, SystemMessage
+from llm_factory import init_llm
+
+# LLM tool routing
+PMID_RE = re.compile(r"\b(\d{7,9})\b")
+_TOOL_NAMES = ("search_papers_by_author", "get_paper_details", "search_paper_by_title")
+
+# Regex classifiers for common query shapes, tried in order before the LLM
+_FAST_ROUTES = (
+    (PMID_RE, "get_paper_details"),
+    (
+        re.compile(
+            r"(?:papers?|research)\s+(?:by|of|from)\s+(?:by\s+)?"
+            r"([a-z].*?)\s*(?:\s(?:on|about|in)\s.*)?(?:\?|$)",
+            re.IGNORECASE,
+        ),
+        "search_papers_by_author",
+    ),
+    (re.compile(r'["\u201c](.+?)["\u201d]'), "search_paper_by_title"),
+    (re.compile(r"(?:^|\s)['\u2018](.+)['\u2019]"), "search_paper_by_title"),
+    (
+        re.compile(r"\babout\s+(.+?)\s*(?:\?|$)", re.IGNORECASE),
+        "search_paper_by_title",
+    ),
+)
+
+# Routing prompt: fixed head (sent as the system message) and a per-query template
+_PROMPT_HEAD = """You are a research paper assistant. Based on the user's request, decide which tool to use.
+
+Available tools:
+- search_papers_by_author("author name") - Search for papers by an author
+- get_paper_details("paper_id") - Get details about a specific paper (ID must be numeric)
+- search_paper_by_title("paper title") - Search for a paper by its title
+
+Respond with EXACTLY ONE of these formats:
+1. If searching by author: Tool: search_papers_by_author("Author Name")
+2. If getting paper details by ID: Tool: get_paper_details("12345678")
+3. If searching by paper title: Tool: search_paper_by_title("Paper Title")
+4. If you can answer without tools: Direct: [your answer]"""
+_REQUEST_TMPL = "User request: {q}\n\nYour response:"
+_FOLLOW_UP_TMPL = (
+    "User request: {q}\n\nRecent conversation:\n{history}\n\nYour response:"
+)
+_ROUTER_SYSTEM_MESSAGE = SystemMessage(content=_PROMPT_HEAD)
+
+
+def _normalize_query(user_input: str) -> str:
+    """Lowercase and collapse whitespace, so trivially different phrasings share
+    one routing decision. (Inputs with a paper ID never get here: the fast path
+    routes them.)"""
+    return " ".join(user_input.lower().split())
+
+
+def _fast_route(user_input: str) -> Optional[Tuple[str, str]]:
+    """Route regex-classifiable queries without an LLM turn."""
+    for pattern, tool_name in _FAST_ROUTES:
+        match = pattern.search(user_input)
+        if match:
+            return tool_name, match.group(1).strip()
+    return None
+
+
+def _parse_tool_call(llm_output: str) -> tuple:
+    """Parse the LLM output to extract tool name and arguments."""
+    # Look for patterns like: Tool: search_papers_by_author("Dr. Name")
+    # Plain prefix checks against the known tool names, no regex
+    start = llm_output.find("Tool:")
+    while start >= 0:
+        rest = llm_output[start + 5 :].lstrip()
+        for tool_name in _TOOL_NAMES:
+            if rest.startswith(tool_name) and rest.startswith('("', len(tool_name)):
+                arg_start = len(tool_name) + 2
+                end = rest.find('")', arg_start)
+                if end > arg_start:
+                    return tool_name, rest[arg_start:end]
+        start = llm_output.find("Tool:", start + 5)
+    return None, None
+
+
+def _ask_router(request: str) -> Tuple[str, str]:
+    """Ask the LLM which tool to use. Returns (tool_name, argument), ("Direct", answer)
+    or (None, None)."""
+    # Fixed instructions go in the system message so the prompt prefix is identical
+    # on every turn; only the user request varies
+    messages = [_ROUTER_SYSTEM_MESSAGE, HumanMessage(content=request)]
+
+    # Get LLM decision
+    response = init_llm().invoke(messages)
+    llm_output = response.content
+    print(f"[Agent] LLM decision: {llm_output[:100]}...")
+
+    # Check if direct response
+    if llm_output.startswith("Direct:"):
+        return "Direct", llm_output[7:].strip()
+
+    return _parse_tool_call(llm_output)
+
+
+@functools.lru_cache(maxsize=4096)
+def _route_query(normalized_input: str) -> Tuple[str, str]:
+    """Route a standalone query. Cached, since the LLM runs at temperature 0."""
+    return _ask_router(_REQUEST_TMPL.format(q=normalized_input))
+
+
+def route_user_query(
+    user_input: str, history: Sequence[str] = ()
+) -> Tuple[Optional[str], Optional[str]]:
+    """Decide which tool to run: regex fast path first, then the LLM router.
+
+    history holds recent conversation lines. With history the LLM sees them and
+    the decision isn't cached, since follow-ups like "details for the second
+    paper" depend on earlier turns. Returns (tool_name, argument),
+    ("Direct", answer) or (None, None).
+    """
+    # Regex-classifiable queries skip the LLM turn entirely
+    route = _fast_route(user_input)
+    if route:
+        return route
+
+    if history:
+        return _ask_router(
+            _FOLLOW_UP_TMPL.format(q=user_input, history="\n".join(history))
+        )
+
+    tool_name, argument = _route_query(_normalize_query(user_input))
+
+    if tool_name and tool_name != "Direct":
+        # Routing ran on lowercased input; recover the user's capitalization
+        start = user_input.lower().find(argument)
+        if start >= 0:
+            argument = user_input[start : start + len(argument)]
+
+    return tool_name, argument
@@ -1,13 +1,14 @@
 import streamlit as st
 import os
-from typing import Dict, List
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_core.tools import tool
-from langchain_groq import ChatGroq
-import requests
-import xml.etree.ElementTree as ET
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import re
+from pubmed_tools import (
+    search_papers_by_author,
+    get_paper_details,
+    search_paper_by_title,
+)
+from query_router import route_user_query
 
 # Load environment variables
 load_dotenv()
@@ -69,176 +70,15 @@ st.markdown(
 )
 
 
-# Initialize Groq LLM
-@st.cache_resource
-def init_llm():
-    return ChatGroq(
-        model=os.getenv("GROQ_MODEL", "llama3-70b-8192"),
-        temperature=0,
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-    )
-
-
-# PubMed API Tools (same as original)
-@tool
-def search_papers_by_author(author_name: str) -> str:
-    """Search for papers by a specific author using PubMed API."""
-    cleaned_name = author_name.strip()
-    titles = ["Dr.", "Dr", "Prof.", "Prof", "Professor", "Mr.", "Ms.", "Mrs."]
-    for title in titles:
-        if cleaned_name.startswith(title + " "):
-            cleaned_name = cleaned_name[len(title) :].strip()
-
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    params = {
-        "db": "pubmed",
-        "term": f"{cleaned_name}[Author]",
-        "retmax": 10,
-        "retmode": "json",
-    }
-
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        id_list = data.get("esearchresult", {}).get("idlist", [])
-        count = data.get("esearchresult", {}).get("count", "0")
-
-        if count == "0":
-            last_name = (
-                cleaned_name.split()[-1] if cleaned_name.split() else cleaned_name
-            )
-            params["term"] = f"{last_name}[Author]"
-            response = requests.get(base_url, params=params, timeout=10)
-            data = response.json()
-            id_list = data.get("esearchresult", {}).get("idlist", [])
-            count = data.get("esearchresult", {}).get("count", "0")
-
-        return f"Found {count} papers by {cleaned_name}. Paper IDs: {', '.join(id_list[:10])}"
-    except Exception as e:
-        return f"Error searching papers: {str(e)}"
-
-
-@tool
-def search_paper_by_title(title: str) -> str:
-    """Search for papers by title using PubMed API."""
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    params = {
-        "db": "pubmed",
-        "term": f'"{title}"[Title]',
-        "retmax": 5,
-        "retmode": "json",
-    }
-
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        id_list = data.get("esearchresult", {}).get("idlist", [])
-
-        if id_list:
-            return get_paper_details.invoke({"paper_id": id_list[0]})
-        else:
-            params["term"] = f"{title}[Title]"
-            response = requests.get(base_url, params=params, timeout=10)
-            data = response.json()
-            id_list = data.get("esearchresult", {}).get("idlist", [])
-
-            if id_list:
-                return get_paper_details.invoke({"paper_id": id_list[0]})
-
-        return "No papers found with this title."
-    except Exception as e:
-        return f"Error searching paper by title: {str(e)}"
-
-
-@tool
-def get_paper_details(paper_id: str) -> str:
-    """Get detailed information about a paper by its PubMed ID."""
-    if not paper_id.isdigit():
-        return f"Invalid paper ID: {paper_id}"
-
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-    params = {"db": "pubmed", "id": paper_id, "retmode": "xml"}
-
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-
-        root = ET.fromstring(response.content)
-        article = root.find(".//PubmedArticle")
-
-        if not article:
-            return f"No article found for ID {paper_id}"
-
-        title = article.findtext(".//ArticleTitle", "No title")
-
-        # Extract abstract
-        abstract_texts = article.findall(".//AbstractText")
-        if abstract_texts:
-            abstract_parts = []
-            for text in abstract_texts:
-                label = text.get("Label", "")
-                content = text.text or ""
-                if label:
-                    abstract_parts.append(f"{label}: {content}")
-                else:
-                    abstract_parts.append(content)
-            abstract = " ".join(abstract_parts)
-        else:
-            abstract = "No abstract available"
-
-        # Extract authors
-        authors = []
-        for author in article.findall(".//Author"):
-            last_name = author.findtext("LastName", "")
-            fore_name = author.findtext("ForeName", "")
-            if last_name or fore_name:
-                authors.append(f"{fore_name} {last_name}".strip())
-
-        journal = article.findtext(".//Journal/Title", "Unknown journal")
-        year = article.findtext(".//PubDate/Year", "Unknown year")
-
-        # Extract DOI
-        doi = None
-        for id_elem in article.findall(".//ArticleId"):
-            if id_elem.get("IdType") == "doi":
-                doi = id_elem.text
-                break
-
-        return {
-            "paper_id": paper_id,
-            "title": title,
-            "authors": authors,
-            "journal": journal,
-            "year": year,
-            "doi": doi,
-            "abstract": abstract,
-        }
-
-    except Exception as e:
-        return f"Error fetching paper details: {str(e)}"
-
-
 # Research Agent Class (simplified for Streamlit)
 class StreamlitResearchAgent:
-    def __init__(self, llm):
-        self.llm = llm
+    def __init__(self):
         self.tools = {
             "search_papers_by_author": search_papers_by_author,
             "get_paper_details": get_paper_details,
             "search_paper_by_title": search_paper_by_title,
         }
 
-    def parse_tool_call(self, llm_output: str) -> tuple:
-        tool_pattern = r'Tool:\s*(\w+)\("([^"]+)"\)'
-        match = re.search(tool_pattern, llm_output)
-        if match:
-            return match.group(1), match.group(2)
-        return None, None
-
     def execute_tool(self, tool_name: str, argument: str):
         if tool_name in self.tools:
             tool = self.tools[tool_name]
@@ -251,44 +91,32 @@ class StreamlitResearchAgent:
         return f"Unknown tool: {tool_name}"
 
     def process_query(self, user_input: str):
-        # Check for direct paper ID
-        id_match = re.search(r"\b(\d{7,9})\b", user_input)
-        if id_match and any(
-            word in user_input.lower()
-            for word in ["details", "paper id", "tell me about", "get"]
-        ):
-            paper_id = id_match.group(1)
-            return self.execute_tool("get_paper_details", paper_id)
-
-        # LLM decision making
-        prompt = f"""You are a research paper assistant. Based on the user's request, decide which tool to use.
-
-Available tools:
-- search_papers_by_author("author name") - Search for papers by an author
-- get_paper_details("paper_id") - Get details about a specific paper
-- search_paper_by_title("paper title") - Search for a paper by its title
+        tool_name, argument = route_user_query(user_input)
 
-User request: {user_input}
+        if tool_name == "Direct":
+            return argument
 
-Respond with EXACTLY ONE of these formats:
-1. Tool: search_papers_by_author("Author Name")
-2. Tool: get_paper_details("12345678")
-3. Tool: search_paper_by_title("Paper Title")
-4. Direct: [your answer]
+        if tool_name:
+            return self.execute_tool(tool_name, argument)
 
-Your response:"""
+        return "I couldn't understand your request. Please try again."
 
-        response = self.llm.invoke(prompt)
-        llm_output = response.content
 
-        if llm_output.startswith("Direct:"):
-            return llm_output[7:].strip()
+# Papers behind the quick-action button and example queries
+POPULAR_IDS = ("40125545", "37635766")
 
-        tool_name, argument = self.parse_tool_call(llm_output)
-        if tool_name:
-            return self.execute_tool(tool_name, argument)
 
-        return "I couldn't understand your request. Please try again."
+@st.cache_resource
+def prefetch_popular_papers():
+    """Warm the paper-details cache in the background, once per server process."""
+    thread = threading.Thread(
+        target=lambda: [
+            get_paper_details.invoke({"paper_id": paper_id}) for paper_id in POPULAR_IDS
+        ],
+        daemon=True,
+    )
+    thread.start()
+    return thread
 
 
 # Streamlit UI
@@ -305,8 +133,8 @@ def main():
         st.stop()
 
     # Initialize agent
-    llm = init_llm()
-    agent = StreamlitResearchAgent(llm)
+    agent = StreamlitResearchAgent()
+    prefetch_popular_papers()
 
     # Example queries
     with st.expander("💡 Example Queries", expanded=False):
@@ -359,7 +187,7 @@ def main():
         if st.button("🔬 Random Paper", use_container_width=True):
             with st.spinner("Fetching a random paper..."):
                 # Get a random recent paper (simplified)
-                result = agent.execute_tool("get_paper_details", "40125545")
+                result = agent.execute_tool("get_paper_details", POPULAR_IDS[0])
                 display_results(result)
 
     with col2:
@@ -381,28 +209,45 @@ def main():
 def display_results(result):
     """Display search results in a formatted way."""
     if isinstance(result, dict):
-        # Single paper result
-        display_paper_card(result)
-    elif isinstance(result, str):
-        if "Found" in result and "papers by" in result:
-            # Search result with IDs
-            st.success(result)
+        if "paper_ids" in result:
+            # Author search result with IDs
+            paper_ids = result["paper_ids"]
+            st.success(
+                f"Found {result['count']} papers by {result['author']}. "
+                f"Paper IDs: {', '.join(paper_ids[:10])}"
+            )
 
-            # Extract paper IDs and show first few papers
-            paper_ids = re.findall(r"\b(\d{7,9})\b", result)
-            if paper_ids:
+            # Show the first few papers - normally prefetched with the search
+            papers = result.get("papers")
+            if papers:
+                st.markdown("### 📄 Paper Details")
+                for paper_details in papers:
+                    display_paper_card(paper_details)
+            elif paper_ids:
                 st.markdown("### 📄 Paper Details")
-                for i, paper_id in enumerate(paper_ids[:3]):  # Show first 3 papers
-                    with st.spinner(f"Loading paper {i+1}..."):
-                        paper_details = get_paper_details.invoke({"paper_id": paper_id})
-                        if isinstance(paper_details, dict):
-                            display_paper_card(paper_details)
+                # Fetch the first 3 papers concurrently; the work is network-bound
+                with st.spinner("Loading papers..."):
+                    with ThreadPoolExecutor(max_workers=3) as executor:
+                        papers = list(
+                            executor.map(
+                                lambda paper_id: get_paper_details.invoke(
+                                    {"paper_id": paper_id}
+                                ),
+                                paper_ids[:3],
+                            )
+                        )
+                for paper_details in papers:
+                    if isinstance(paper_details, dict):
+                        display_paper_card(paper_details)
+        else:
+            # Single paper result
+            display_paper_card(result)
+    elif isinstance(result, str):
+        # Other string results
+        if "Error" in result:
+            st.error(result)
         else:
-            # Other string results
-            if "Error" in result:
-                st.error(result)
-            else:
-                st.info(result)
+            st.info(result)
     else:
         st.write(result)
 
@@ -419,7 +264,7 @@ def display_paper_card(paper_data):
         <div class="paper-card">
             <div class="paper-title">{paper_data.get('title', 'No title')}</div>
             <div class="paper-meta">
-                <strong>Authors:</strong> {', '.join(paper_data.get('authors', [])) if paper_data.get('authors') else 'No authors listed'}<br>
+                <strong>Authors:</strong> {paper_data.get('authors_str', 'No authors listed')}<br>
                 <strong>Journal:</strong> {paper_data.get('journal', 'Unknown')} ({paper_data.get('year', 'Unknown year')})<br>
                 <strong>Paper ID:</strong> {paper_data.get('paper_id', 'N/A')}<br>
                 <strong>DOI:</strong> {paper_data.get('doi', 'Not available')}
@@ -1,14 +1,19 @@
 import streamlit as st
 import os
-from typing import Dict, List
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from typing import Dict, List, Optional, Tuple
 from langchain_core.tools import tool
-from langchain_groq import ChatGroq
-import requests
-import xml.etree.ElementTree as ET
 from dotenv import load_dotenv
-import re
-import time
+from pubmed_tools import (
+    MAX_RETRIEVABLE_RECORDS,
+    SESSION,
+    clean_author_name,
+    decode_esearch,
+    esummary_batch,
+    esummary_history,
+    fetch_paper_details,
+    search_papers_for_authors_batch,
+)
+from query_router import PMID_RE, route_user_query
 
 # Load environment variables
 load_dotenv()
@@ -22,8 +27,7 @@ st.set_page_config(
 )
 
 # Custom CSS for better styling
-st.markdown(
-    """
+_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -115,50 +119,55 @@ st.markdown(
         opacity: 1 !important;
         cursor: default !important;
     }
-    .progress-container {
-        background: #e9ecef;
-        border-radius: 10px;
-        height: 6px;
-        margin: 0.5rem 0;
-        overflow: hidden;
-    }
-    .progress-bar {
-        background: linear-gradient(90deg, #2E86AB 0%, #4A90A4 100%);
-        height: 100%;
-        border-radius: 10px;
-        transition: width 0.3s ease;
-    }
     .loading-text {
         text-align: center;
         color: #666;
         margin: 0.5rem 0;
     }
 </style>
-""",
-    unsafe_allow_html=True,
-)
-
-
-# Initialize Groq LLM
-@st.cache_resource
-def init_llm():
-    return ChatGroq(
-        model=os.getenv("GROQ_MODEL", "llama3-70b-8192"),
-        temperature=0,
-        groq_api_key=os.getenv("GROQ_API_KEY"),
-    )
-
-
-# Enhanced PubMed API Tools to get MORE papers
-@tool
-def search_papers_by_author(author_name: str) -> dict:
-    """Search for papers by a specific author using PubMed API."""
-    cleaned_name = author_name.strip()
-    titles = ["Dr.", "Dr", "Prof.", "Prof", "Professor", "Mr.", "Ms.", "Mrs."]
-    for title in titles:
-        if cleaned_name.startswith(title + " "):
-            cleaned_name = cleaned_name[len(title) :].strip()
-
+"""
+
+# Static example-queries panel
+_EXAMPLE_QUERIES_HTML = """
+<div class="example-queries">
+<strong>Try these example searches:</strong><br>
+• "Show papers by Dr. Debasisa Mohanty"<br>
+• "Research papers by Dr. Gitanjali Yadav"<br>
+• "Get details for paper ID 37635766"<br>
+• "Tell me about paper 40125545"<br>
+• "Find paper about HgutMgene-Miner"
+</div>
+"""
+
+# Paper card markup, filled per paper with str.format_map
+_CARD_TEMPLATE = """
+<div class="paper-card">
+  {number_html}
+  <div class="paper-title">{title}</div>
+  <div class="paper-meta">
+    <strong>Authors:</strong> {authors_str}<br>
+    <strong>Journal:</strong> {journal} ({year})<br>
+    <strong>Paper ID:</strong> {paper_id}<br>
+    <strong>DOI:</strong> {doi}
+  </div>
+</div>
+"""
+_CARD_DEFAULTS = {
+    "title": "No title",
+    "authors_str": "No authors listed",
+    "journal": "Unknown",
+    "year": "Unknown year",
+    "paper_id": "N/A",
+}
+
+
+# Cached NCBI calls. Streamlit reruns the script on every click, so repeat
+# searches and page revisits are served from here. Failures raise instead of
+# returning, so errors are never cached.
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _cached_esearch_author(cleaned_name: str) -> Dict:
+    """Newest 50 paper IDs, total count and history-server key for an author
+    (falls back to last name)."""
     base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
     params = {
         "db": "pubmed",
@@ -166,32 +175,87 @@ def search_papers_by_author(author_name: str) -> dict:
         "retmax": 50,  # ← INCREASED FROM 10 TO 50
         "retmode": "json",
         "sort": "pub_date",  # ← SORT BY DATE (NEWEST FIRST)
+        "usehistory": "y",  # Keep the full result on NCBI for paging with esummary
     }
 
-    try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+    response = SESSION.get(base_url, params=params, timeout=10)
+    response.raise_for_status()
+    esearch = decode_esearch(response.content)
+
+    if esearch.count == "0":
+        last_name = cleaned_name.split()[-1] if cleaned_name.split() else cleaned_name
+        params["term"] = f"{last_name}[Author]"
+        response = SESSION.get(base_url, params=params, timeout=10)
+        esearch = decode_esearch(response.content)
+
+    return {
+        "count": int(esearch.count),
+        "paper_ids": esearch.idlist,
+        "webenv": esearch.webenv,
+        "query_key": esearch.querykey,
+    }
 
-        id_list = data.get("esearchresult", {}).get("idlist", [])
-        count = data.get("esearchresult", {}).get("count", "0")
 
-        if count == "0":
-            last_name = (
-                cleaned_name.split()[-1] if cleaned_name.split() else cleaned_name
-            )
-            params["term"] = f"{last_name}[Author]"
-            response = requests.get(base_url, params=params, timeout=10)
-            data = response.json()
-            id_list = data.get("esearchresult", {}).get("idlist", [])
-            count = data.get("esearchresult", {}).get("count", "0")
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _cached_esearch_title(title: str) -> Optional[str]:
+    """ID of the best title match (exact, then partial), or None."""
+    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+    params = {
+        "db": "pubmed",
+        "term": f'"{title}"[Title]',
+        "retmax": 5,
+        "retmode": "json",
+    }
+
+    response = SESSION.get(base_url, params=params, timeout=10)
+    response.raise_for_status()
+    id_list = decode_esearch(response.content).idlist
+
+    if not id_list:
+        params["term"] = f"{title}[Title]"
+        response = SESSION.get(base_url, params=params, timeout=10)
+        id_list = decode_esearch(response.content).idlist
 
+    return id_list[0] if id_list else None
+
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _cached_efetch(paper_id: str) -> Optional[Dict]:
+    """Details for one paper via the shared lxml-based fetch and parse."""
+    return fetch_paper_details(paper_id)
+
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _cached_esummary_page(
+    webenv: str, query_key: str, retstart: int, retmax: int
+) -> List[Dict]:
+    """One page of an author search straight from NCBI's history server."""
+    return esummary_history(webenv, query_key, retstart, retmax)
+
+
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def _cached_esummary_batch(paper_ids: Tuple[str, ...]) -> Dict[str, Dict]:
+    """Card fields for one page of papers from a single esummary request, keyed by
+    paper ID. Abstracts are fetched separately, only when a reader asks."""
+    return {paper["paper_id"]: paper for paper in esummary_batch(list(paper_ids))}
+
+
+# Enhanced PubMed API Tools to get MORE papers
+@tool
+def search_papers_by_author(author_name: str) -> dict:
+    """Search for papers by a specific author using PubMed API."""
+    cleaned_name = clean_author_name(author_name)
+
+    try:
+        esearch = _cached_esearch_author(cleaned_name)
         # ← RETURN STRUCTURED DATA INSTEAD OF STRING
         return {
             "success": True,
-            "count": int(count),
+            "count": esearch["count"],
             "author": cleaned_name,
-            "paper_ids": id_list,
+            "paper_ids": esearch["paper_ids"],
+            "webenv": esearch["webenv"],
+            "query_key": esearch["query_key"],
         }
     except Exception as e:
         return {"success": False, "error": str(e)}
@@ -200,40 +264,19 @@ def search_papers_by_author(author_name: str) -> dict:
 @tool
 def search_paper_by_title(title: str) -> dict:  # ← Changed from str to dict
     """Search for papers by title using PubMed API."""
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
-    params = {
-        "db": "pubmed",
-        "term": f'"{title}"[Title]',
-        "retmax": 5,
-        "retmode": "json",
-    }
-
     try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-
-        id_list = data.get("esearchresult", {}).get("idlist", [])
-
-        if id_list:
-            # This already returns a dict from get_paper_details
-            return get_paper_details.invoke({"paper_id": id_list[0]})
-        else:
-            params["term"] = f"{title}[Title]"
-            response = requests.get(base_url, params=params, timeout=10)
-            data = response.json()
-            id_list = data.get("esearchresult", {}).get("idlist", [])
-
-            if id_list:
-                # This already returns a dict from get_paper_details
-                return get_paper_details.invoke({"paper_id": id_list[0]})
-
-        # Return dict for consistency
-        return {"success": False, "error": "No papers found with this title."}
+        paper_id = _cached_esearch_title(title)
     except Exception as e:
         # Return dict for consistency
         return {"success": False, "error": f"Error searching paper by title: {str(e)}"}
 
+    if paper_id:
+        # This already returns a dict from get_paper_details
+        return get_paper_details.invoke({"paper_id": paper_id})
+
+    # Return dict for consistency
+    return {"success": False, "error": "No papers found with this title."}
+
 
 @tool
 def get_paper_details(paper_id: str) -> dict:  # ← Changed from str to dict
@@ -242,88 +285,28 @@ def get_paper_details(paper_id: str) -> dict:  # ← Changed from str to dict
         # Return dict for consistency
         return {"success": False, "error": f"Invalid paper ID: {paper_id}"}
 
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-    params = {"db": "pubmed", "id": paper_id, "retmode": "xml"}
-
     try:
-        response = requests.get(base_url, params=params, timeout=10)
-        response.raise_for_status()
-
-        root = ET.fromstring(response.content)
-        article = root.find(".//PubmedArticle")
-
-        if not article:
-            # Return dict for consistency
-            return {"success": False, "error": f"No article found for ID {paper_id}"}
-
-        title = article.findtext(".//ArticleTitle", "No title")
-
-        # Extract abstract
-        abstract_texts = article.findall(".//AbstractText")
-        if abstract_texts:
-            abstract_parts = []
-            for text in abstract_texts:
-                label = text.get("Label", "")
-                content = text.text or ""
-                if label:
-                    abstract_parts.append(f"{label}: {content}")
-                else:
-                    abstract_parts.append(content)
-            abstract = " ".join(abstract_parts)
-        else:
-            abstract = "No abstract available"
-
-        # Extract authors
-        authors = []
-        for author in article.findall(".//Author"):
-            last_name = author.findtext("LastName", "")
-            fore_name = author.findtext("ForeName", "")
-            if last_name or fore_name:
-                authors.append(f"{fore_name} {last_name}".strip())
-
-        journal = article.findtext(".//Journal/Title", "Unknown journal")
-        year = article.findtext(".//PubDate/Year", "Unknown year")
-
-        # Extract DOI
-        doi = None
-        for id_elem in article.findall(".//ArticleId"):
-            if id_elem.get("IdType") == "doi":
-                doi = id_elem.text
-                break
-
-        # This is already returning a dict - it was correct!
-        return {
-            "paper_id": paper_id,
-            "title": title,
-            "authors": authors,
-            "journal": journal,
-            "year": year,
-            "doi": doi,
-            "abstract": abstract,
-        }
-
+        paper = _cached_efetch(paper_id)
     except Exception as e:
         # Return dict for consistency
         return {"success": False, "error": f"Error fetching paper details: {str(e)}"}
 
+    if paper is None:
+        # Return dict for consistency
+        return {"success": False, "error": f"No article found for ID {paper_id}"}
+
+    return paper
+
 
 # Research Agent Class (updated to handle new return format)
 class StreamlitResearchAgent:
-    def __init__(self, llm):
-        self.llm = llm
+    def __init__(self):
         self.tools = {
             "search_papers_by_author": search_papers_by_author,
             "get_paper_details": get_paper_details,
             "search_paper_by_title": search_paper_by_title,
         }
 
-    def parse_tool_call(self, llm_output: str) -> tuple:
-        tool_pattern = r'Tool:\s*(\w+)\("([^"]+)"\)'
-        match = re.search(tool_pattern, llm_output)
-        if match:
-            return match.group(1), match.group(2)
-        return None, None
-
     def execute_tool(self, tool_name: str, argument: str):
         if tool_name in self.tools:
             tool = self.tools[tool_name]
@@ -336,48 +319,28 @@ class StreamlitResearchAgent:
         return f"Unknown tool: {tool_name}"
 
     def process_query(self, user_input: str):
-        # Check for direct paper ID
-        id_match = re.search(r"\b(\d{7,9})\b", user_input)
-        if id_match and any(
-            word in user_input.lower()
-            for word in ["details", "paper id", "tell me about", "get"]
-        ):
-            paper_id = id_match.group(1)
-            return self.execute_tool("get_paper_details", paper_id)
-
-        # LLM decision making
-        prompt = f"""You are a research paper assistant. Based on the user's request, decide which tool to use.
+        # Regex fast path first, then the cached LLM router
+        tool_name, argument = route_user_query(user_input)
 
-Available tools:
-- search_papers_by_author("author name") - Search for papers by an author
-- get_paper_details("paper_id") - Get details about a specific paper
-- search_paper_by_title("paper title") - Search for a paper by its title
+        if tool_name == "Direct":
+            return argument
 
-User request: {user_input}
-
-Respond with EXACTLY ONE of these formats:
-1. Tool: search_papers_by_author("Author Name")
-2. Tool: get_paper_details("12345678")
-3. Tool: search_paper_by_title("Paper Title")
-4. Direct: [your answer]
-
-Your response:"""
-
-        response = self.llm.invoke(prompt)
-        llm_output = response.content
-
-        if llm_output.startswith("Direct:"):
-            return llm_output[7:].strip()
-
-        tool_name, argument = self.parse_tool_call(llm_output)
         if tool_name:
             return self.execute_tool(tool_name, argument)
 
         return "I couldn't understand your request. Please try again."
 
 
+# Seed authors behind the "Popular Authors" quick action
+POPULAR_AUTHORS = ("Debasisa Mohanty", "Gitanjali Yadav")
+
+
 # Streamlit UI
 def main():
+    # Styles are re-sent on full reruns only: Streamlit drops any element a rerun
+    # doesn't draw, and pagination reruns just the paper-list fragment
+    st.markdown(_CSS, unsafe_allow_html=True)
+
     # Header
     st.markdown(
         '<h1 class="main-header">📚 PubMed Research Assistant</h1>',
@@ -390,24 +353,11 @@ def main():
         st.stop()
 
     # Initialize agent
-    llm = init_llm()
-    agent = StreamlitResearchAgent(llm)
+    agent = StreamlitResearchAgent()
 
     # Example queries
     with st.expander("💡 Example Queries", expanded=False):
-        st.markdown(
-            """
-        <div class="example-queries">
-        <strong>Try these example searches:</strong><br>
-        • "Show papers by Dr. Debasisa Mohanty"<br>
-        • "Research papers by Dr. Gitanjali Yadav"<br>
-        • "Get details for paper ID 37635766"<br>
-        • "Tell me about paper 40125545"<br>
-        • "Find paper about HgutMgene-Miner"
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(_EXAMPLE_QUERIES_HTML, unsafe_allow_html=True)
 
     # Search interface
     st.markdown('<div class="search-box">', unsafe_allow_html=True)
@@ -432,12 +382,16 @@ def main():
 
     # Process query
     if search_button and query:
+        st.session_state.pop("author_search", None)
         with st.spinner("Searching PubMed database..."):
             try:
                 result = agent.process_query(query)
                 display_results(result)
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
+    elif "author_search" in st.session_state:
+        # Redraw the last author search on other reruns without searching again
+        display_all_author_papers(st.session_state["author_search"])
 
     # Quick action buttons
     st.markdown("### Quick Actions")
@@ -452,7 +406,16 @@ def main():
 
     with col2:
         if st.button("📊 Popular Authors", use_container_width=True):
-            st.info("Try searching for: Nature, Science, Cell, NEJM authors")
+            with st.spinner("Searching popular authors..."):
+                # One search for every seed author; pages come from its history key
+                result = search_papers_for_authors_batch(list(POPULAR_AUTHORS), k=0)
+            if isinstance(result, dict):
+                # Drawn once, full width, by the author-search redraw above
+                st.session_state["author_search"] = result
+                st.session_state.current_page = 1
+                st.rerun()
+            else:
+                st.error(result)
 
     with col3:
         if st.button("ℹ️ Help", use_container_width=True):
@@ -471,6 +434,9 @@ def display_results(result):
     if isinstance(result, dict):
         # Check if it's author search results with paper_ids (our enhanced feature)
         if result.get("success") and "paper_ids" in result:
+            # Kept in session state so pagination never re-runs the search
+            st.session_state["author_search"] = result
+            st.session_state.current_page = 1
             display_all_author_papers(result)
         else:
             # Single paper result (dict format) - SAME AS ORIGINAL
@@ -480,7 +446,7 @@ def display_results(result):
             # Author search result with IDs - SAME AS ORIGINAL
             st.success(result)
             # Extract paper IDs and show first few papers
-            paper_ids = re.findall(r"\b(\d{7,9})\b", result)
+            paper_ids = PMID_RE.findall(result)
             if paper_ids:
                 st.markdown("### 📄 Paper Details")
                 for i, paper_id in enumerate(paper_ids[:3]):  # Show first 3 papers
@@ -498,17 +464,29 @@ def display_results(result):
         st.write(result)
 
 
+@st.fragment
 def display_all_author_papers(search_result):
-    """Display ALL papers for an author with clean bottom pagination."""
+    """Display ALL papers for an author with clean bottom pagination.
+
+    A fragment: pagination clicks rerun only this function, not the search or
+    the LLM router in main().
+    """
     author_name = search_result["author"]
     total_papers = search_result["count"]
     paper_ids = search_result["paper_ids"]
+    webenv = search_result.get("webenv")
+
+    # With a history-server key every matching paper NCBI will serve can be paged
+    # through; without one, only the IDs the search returned
+    n_available = (
+        min(total_papers, MAX_RETRIEVABLE_RECORDS) if webenv else len(paper_ids)
+    )
 
     # Show stats
     st.markdown(
         f"""
     <div class="stats-bar">
-        📊 Found {total_papers:,} papers by {author_name} • Showing {len(paper_ids)} most recent
+        📊 Found {total_papers:,} papers by {author_name} • Showing {n_available:,} most recent
     </div>
     """,
         unsafe_allow_html=True,
@@ -523,7 +501,7 @@ def display_all_author_papers(search_result):
     )
 
     # Calculate pagination
-    total_pages = (len(paper_ids) + papers_per_page - 1) // papers_per_page
+    total_pages = (n_available + papers_per_page - 1) // papers_per_page
 
     # Reset current page when papers per page changes
     if "prev_papers_per_page" not in st.session_state:
@@ -547,8 +525,7 @@ def display_all_author_papers(search_result):
 
     # Get papers for current page
     start_idx = (current_page - 1) * papers_per_page
-    end_idx = min(start_idx + papers_per_page, len(paper_ids))
-    current_page_ids = paper_ids[start_idx:end_idx]
+    end_idx = min(start_idx + papers_per_page, n_available)
 
     # Progress tracking
     progress_placeholder = st.empty()
@@ -561,25 +538,32 @@ def display_all_author_papers(search_result):
         f"**Debug:** Current page: {current_page}, Total pages: {total_pages}, Papers per page: {papers_per_page}"
     )
 
-    for i, paper_id in enumerate(current_page_ids):
-        # Show progress
-        progress = (i + 1) / len(current_page_ids)
-        progress_placeholder.markdown(
-            f"""
-        <div class="loading-text">Loading paper {i + 1} of {len(current_page_ids)}...</div>
-        <div class="progress-container">
-            <div class="progress-bar" style="width: {progress * 100}%"></div>
-        </div>
-        """,
-            unsafe_allow_html=True,
-        )
-
-        # Get paper details
-        paper_details = get_paper_details.invoke({"paper_id": paper_id})
-        if isinstance(paper_details, dict):
-            display_paper_card(paper_details, start_idx + i + 1)
+    # Fetch the whole page with one esummary request
+    progress_placeholder.markdown(
+        f'<div class="loading-text">Loading {end_idx - start_idx} papers...</div>',
+        unsafe_allow_html=True,
+    )
+    try:
+        if end_idx <= start_idx:
+            # Nothing to show (zero-hit search), so nothing to fetch
+            papers = []
+        elif webenv:
+            # The history server returns exactly this page, newest first
+            papers = _cached_esummary_page(
+                webenv, search_result["query_key"], start_idx, end_idx - start_idx
+            )
+        else:
+            current_page_ids = paper_ids[start_idx:end_idx]
+            papers_by_id = _cached_esummary_batch(tuple(current_page_ids))
+            papers = [
+                papers_by_id[pid] for pid in current_page_ids if pid in papers_by_id
+            ]
+    except Exception as e:
+        papers = []
+        st.error(f"Error fetching paper details: {str(e)}")
 
-        time.sleep(0.1)  # Small delay to show progress
+    for i, paper_details in enumerate(papers):
+        display_paper_card(paper_details, start_idx + i + 1)
 
     # Clear progress
     progress_placeholder.empty()
@@ -592,7 +576,7 @@ def display_all_author_papers(search_result):
     st.markdown(
         f"""
     <div class="pagination-info">
-        Showing papers {start_idx + 1}-{end_idx} of {len(paper_ids)} 
+        Showing papers {start_idx + 1}-{end_idx} of {n_available:,} 
         ({total_papers:,} total papers found)
     </div>
     """,
@@ -600,6 +584,12 @@ def display_all_author_papers(search_result):
     )
 
 
+def _go_to_page(page_num):
+    # Button callback: runs before the (fragment) rerun, so the new page is drawn
+    # straight away without an extra st.rerun()
+    st.session_state.current_page = page_num
+
+
 def create_clean_pagination(current_page, total_pages):
     """Create clean, working pagination with Streamlit buttons."""
 
@@ -611,9 +601,13 @@ def create_clean_pagination(current_page, total_pages):
 
     # Previous button
     with cols[0]:
-        if st.button("← Previous", disabled=current_page <= 1, key="prev_page"):
-            st.session_state.current_page = max(1, current_page - 1)
-            st.rerun()  # Use st.rerun() instead of experimental_rerun()
+        st.button(
+            "← Previous",
+            disabled=current_page <= 1,
+            key="prev_page",
+            on_click=_go_to_page,
+            args=(max(1, current_page - 1),),
+        )
 
     # Calculate which pages to show (max 5 page buttons)
     if total_pages <= 5:
@@ -650,15 +644,22 @@ def create_clean_pagination(current_page, total_pages):
                     )
                 else:
                     # Other page buttons
-                    if st.button(str(page_num), key=f"page_{page_num}"):
-                        st.session_state.current_page = page_num
-                        st.rerun()  # Use st.rerun() instead of experimental_rerun()
+                    st.button(
+                        str(page_num),
+                        key=f"page_{page_num}",
+                        on_click=_go_to_page,
+                        args=(page_num,),
+                    )
 
     # Next button
     with cols[6]:
-        if st.button("Next →", disabled=current_page >= total_pages, key="next_page"):
-            st.session_state.current_page = min(total_pages, current_page + 1)
-            st.rerun()  # Use st.rerun() instead of experimental_rerun()
+        st.button(
+            "Next →",
+            disabled=current_page >= total_pages,
+            key="next_page",
+            on_click=_go_to_page,
+            args=(min(total_pages, current_page + 1),),
+        )
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -669,37 +670,53 @@ def display_paper_card(paper_data, paper_number=None):
         st.write(paper_data)
         return
 
-    # Build the card HTML
-    card_html = f"""
-    <div class="paper-card">
-      {'<div class="paper-number">#' + str(paper_number) + '</div>' if paper_number else ''}
-      <div class="paper-title">{paper_data.get('title', 'No title')}</div>
-      <div class="paper-meta">
-        <strong>Authors:</strong> {', '.join(paper_data.get('authors', [])) if paper_data.get('authors') else 'No authors listed'}<br>
-        <strong>Journal:</strong> {paper_data.get('journal', 'Unknown')} ({paper_data.get('year', 'Unknown year')})<br>
-        <strong>Paper ID:</strong> {paper_data.get('paper_id', 'N/A')}<br>
-        <strong>DOI:</strong> {paper_data.get('doi', 'Not available')}
-      </div>
-    </div>
-    """
+    # Build the card HTML; authors_str is pre-joined when the paper is parsed
+    card_html = _CARD_TEMPLATE.format_map(
+        {
+            **_CARD_DEFAULTS,
+            **paper_data,
+            "doi": paper_data.get("doi") or "Not available",
+            "number_html": (
+                f'<div class="paper-number">#{paper_number}</div>'
+                if paper_number
+                else ""
+            ),
+        }
+    )
 
     # Render the card
     st.markdown(card_html, unsafe_allow_html=True)
 
-    # Abstract
-    if paper_data.get("abstract") and paper_data["abstract"] != "No abstract available":
-        with st.expander("📝 Abstract", expanded=False):
-            abstract_html = f'<div class="abstract-text">{paper_data["abstract"]}</div>'
+    # Abstract - list cards come from ESummary, which has none, so it is only
+    # fetched once the reader switches it on (the toggle state is kept per paper)
+    abstract = paper_data.get("abstract")
+    requested = False
+    if abstract is None and paper_data.get("paper_id"):
+        requested = st.toggle(
+            "📝 Load abstract",
+            key=f"abstract_{paper_data['paper_id']}_{paper_number or 'single'}",
+        )
+        if requested:
+            details = get_paper_details.invoke({"paper_id": paper_data["paper_id"]})
+            if details.get("success") is False:
+                st.error(details["error"])
+                requested = False
+            else:
+                abstract = details.get("abstract")
+
+    if abstract and abstract != "No abstract available":
+        with st.expander("📝 Abstract", expanded=requested):
+            abstract_html = f'<div class="abstract-text">{abstract}</div>'
             st.markdown(abstract_html, unsafe_allow_html=True)
+    elif requested:
+        st.caption("No abstract available")
 
     # Buttons
     col1, col2, col3 = st.columns(3)
     with col1:
-        doi = paper_data.get("doi")
-        if doi:
-            st.markdown(
-                f"[🔗 View Paper](https://doi.org/{doi})", unsafe_allow_html=True
-            )
+        doi_link = paper_data.get("doi_link")
+        if doi_link:
+            st.markdown(f"[🔗 View Paper]({doi_link})", unsafe_allow_html=True)
     with col2:
         pid = paper_data.get("paper_id")
         if pid: